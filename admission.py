@@ -0,0 +1,77 @@
+import math
+import time
+from config import (
+    MESSAGES, USER_UPLOADS_PER_MINUTE, USER_UPLOAD_BURST,
+    USER_MAX_QUEUED_BYTES, QUEUE_HIGH_WATER_MARK
+)
+
+class AdmissionRejected(Exception):
+    """Raised when a new upload is refused at enqueue time"""
+    pass
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+    
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def try_consume(self):
+        """Take one token if available"""
+        self.refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+    
+    def retry_after(self):
+        """Seconds until the next token is available"""
+        return max(1, math.ceil((1 - self.tokens) / self.rate))
+
+class AdmissionController:
+    """Per-user rate limits and quotas, kept entirely in memory"""
+    def __init__(self):
+        self.buckets = {}
+        self.queued_bytes = {}
+        self.queue_depth = 0
+    
+    def seed(self, pending):
+        """Load outstanding work per user, as returned by get_pending_by_user"""
+        self.queued_bytes = {item['_id']: item['bytes'] for item in pending}
+        self.queue_depth = sum(item['count'] for item in pending)
+    
+    def admit(self, chat_id, file_size):
+        """Reserve queue capacity for a new upload or raise AdmissionRejected"""
+        file_size = file_size or 0
+        
+        if self.queue_depth >= QUEUE_HIGH_WATER_MARK:
+            raise AdmissionRejected(MESSAGES['queue_full'])
+        
+        if self.queued_bytes.get(chat_id, 0) + file_size > USER_MAX_QUEUED_BYTES:
+            limit_mb = USER_MAX_QUEUED_BYTES // (1024 * 1024)
+            raise AdmissionRejected(MESSAGES['quota_exceeded'].format(f"{limit_mb} MB"))
+        
+        # Check the token bucket last so rejected files don't cost a token
+        bucket = self.buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(USER_UPLOADS_PER_MINUTE / 60.0, USER_UPLOAD_BURST)
+            self.buckets[chat_id] = bucket
+        if not bucket.try_consume():
+            raise AdmissionRejected(MESSAGES['rate_limited'].format(bucket.retry_after()))
+        
+        self.queued_bytes[chat_id] = self.queued_bytes.get(chat_id, 0) + file_size
+        self.queue_depth += 1
+    
+    def release(self, chat_id, file_size):
+        """Return capacity once an upload has finished or failed to enqueue"""
+        remaining = self.queued_bytes.get(chat_id, 0) - (file_size or 0)
+        if remaining > 0:
+            self.queued_bytes[chat_id] = remaining
+        else:
+            self.queued_bytes.pop(chat_id, None)
+        self.queue_depth = max(0, self.queue_depth - 1)
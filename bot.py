@@ -1,11 +1,18 @@
 import asyncio
+import io
 import logging
+import signal
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from datetime import datetime
 
-from config import BOT_TOKEN, MESSAGES
+from config import (
+    BOT_TOKEN, MESSAGES, BUNDLE_MAX_FILES, BUNDLE_MAX_BYTES, ADMIN_IDS,
+    PROFILE_DEFAULT_SECONDS, PROFILE_MAX_SECONDS
+)
 from queue_manager import GlobalQueueManager
+from admission import AdmissionRejected
+from monitoring import LoopMonitor, dump_tasks
 
 # Set up logging
 logging.basicConfig(
@@ -17,6 +24,12 @@ logger = logging.getLogger(__name__)
 # Global queue manager instance
 queue_manager = None
 
+# Event loop health monitor
+loop_monitor = None
+
+# Open bundle sessions: chat_id -> list of collected file data
+bundle_sessions = {}
+
 def format_file_size(size_bytes):
     """Format file size in human readable format"""
     if not size_bytes:
@@ -75,7 +88,8 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"⚡ Processing: {stats['processing']}\n"
         f"✅ Completed: {stats['completed']}\n"
         f"❌ Failed: {stats['failed']}\n"
-        f"🔧 Processing: {'Active' if queue_manager.is_processing else 'Inactive'}"
+        f"🔧 Processing: {'Active' if queue_manager.is_processing else 'Inactive'}\n"
+        f"🌐 Buzzheavier: {'Unavailable, uploads paused' if queue_manager.uploader.breaker.is_open() else 'Healthy'}"
     )
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -98,6 +112,99 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
     )
 
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /profile [seconds] command to capture a sampling profile (admins only)"""
+    global loop_monitor
+    if update.effective_user.id not in ADMIN_IDS:
+        await update.message.reply_text(MESSAGES['not_admin'])
+        return
+    
+    seconds = PROFILE_DEFAULT_SECONDS
+    if context.args:
+        try:
+            seconds = float(context.args[0])
+        except ValueError:
+            pass
+    seconds = max(1, min(seconds, PROFILE_MAX_SECONDS))
+    
+    await update.message.reply_text(MESSAGES['profile_started'].format(seconds))
+    report = await loop_monitor.capture_profile(seconds)
+    
+    await update.message.reply_document(
+        document=io.BytesIO(report.encode()),
+        filename=f"profile_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.txt",
+        reply_to_message_id=update.message.message_id
+    )
+
+async def bundle_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /bundle command to start collecting files into one archive"""
+    chat_id = update.effective_chat.id
+    if chat_id in bundle_sessions:
+        await update.message.reply_text(
+            MESSAGES['bundle_already_open'].format(len(bundle_sessions[chat_id]))
+        )
+        return
+    
+    bundle_sessions[chat_id] = []
+    await update.message.reply_text(MESSAGES['bundle_started'])
+
+async def done_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /done command to queue the collected bundle as a single upload"""
+    global queue_manager
+    if not queue_manager:
+        await update.message.reply_text("❌ Queue manager not initialized yet. Please wait...")
+        return
+    
+    chat_id = update.effective_chat.id
+    if chat_id not in bundle_sessions:
+        await update.message.reply_text(MESSAGES['no_bundle_open'])
+        return
+    
+    files = bundle_sessions[chat_id]
+    if not files:
+        await update.message.reply_text(MESSAGES['bundle_empty'])
+        return
+    
+    try:
+        bundle_data = {
+            'file_id': f"bundle_{chat_id}_{update.message.message_id}",
+            'file_name': f"bundle_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.zip",
+            'file_size': sum(f['file_size'] or 0 for f in files),
+            'file_type': 'bundle',
+            'files': [{'file_id': f['file_id'], 'file_name': f['file_name']} for f in files],
+            'chat_id': chat_id,
+            'message_id': update.message.message_id
+        }
+        
+        position = await queue_manager.add_to_queue(bundle_data)
+        del bundle_sessions[chat_id]
+        
+        await update.message.reply_text(
+            MESSAGES['bundle_queued'].format(len(files), position),
+            reply_to_message_id=update.message.message_id
+        )
+        
+    except AdmissionRejected as e:
+        await update.message.reply_text(
+            str(e),
+            reply_to_message_id=update.message.message_id
+        )
+    except Exception as e:
+        logger.error(f"Error queueing bundle: {e}")
+        await update.message.reply_text(
+            MESSAGES['error'].format(str(e)),
+            reply_to_message_id=update.message.message_id
+        )
+
+async def cancel_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /cancel command to discard the open bundle"""
+    files = bundle_sessions.pop(update.effective_chat.id, None)
+    if files is None:
+        await update.message.reply_text(MESSAGES['no_bundle_open'])
+        return
+    
+    await update.message.reply_text(MESSAGES['bundle_cancelled'].format(len(files)))
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle incoming messages with files"""
     global queue_manager
@@ -145,6 +252,31 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             'message_id': update.message.message_id
         }
         
+        # Collect into the open bundle instead of queueing on its own
+        bundle = bundle_sessions.get(update.effective_chat.id)
+        if bundle is not None:
+            if len(bundle) >= BUNDLE_MAX_FILES:
+                await update.message.reply_text(
+                    MESSAGES['bundle_full'].format(BUNDLE_MAX_FILES),
+                    reply_to_message_id=update.message.message_id
+                )
+                return
+            
+            bundle_size = sum(f['file_size'] or 0 for f in bundle)
+            if bundle_size + (file_size or 0) > BUNDLE_MAX_BYTES:
+                await update.message.reply_text(
+                    MESSAGES['bundle_too_large'].format(format_file_size(BUNDLE_MAX_BYTES)),
+                    reply_to_message_id=update.message.message_id
+                )
+                return
+            
+            bundle.append(file_data)
+            await update.message.reply_text(
+                MESSAGES['bundle_file_added'].format(len(bundle)),
+                reply_to_message_id=update.message.message_id
+            )
+            return
+        
         # Add to queue
         position = await queue_manager.add_to_queue(file_data)
         
@@ -154,6 +286,11 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             reply_to_message_id=update.message.message_id
         )
             
+    except AdmissionRejected as e:
+        await update.message.reply_text(
+            str(e),
+            reply_to_message_id=update.message.message_id
+        )
     except Exception as e:
         logger.error(f"Error handling message: {e}")
         await update.message.reply_text(
@@ -175,10 +312,20 @@ async def periodic_cleanup():
 
 async def main():
     """Main function"""
-    global queue_manager
+    global queue_manager, loop_monitor
     
     logger.info("Starting Buzzheavier Bot...")
     
+    # Start event loop monitoring; SIGUSR1 logs a dump of all tasks
+    loop_monitor = LoopMonitor()
+    asyncio.create_task(loop_monitor.run())
+    try:
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGUSR1, lambda: logger.info(dump_tasks())
+        )
+    except (NotImplementedError, AttributeError):
+        logger.info("SIGUSR1 task dumps not supported on this platform")
+    
     # Create application
     application = Application.builder().token(BOT_TOKEN).build()
     
@@ -187,11 +334,19 @@ async def main():
     application.add_handler(CommandHandler("queue", queue_command))
     application.add_handler(CommandHandler("status", status_command))
     application.add_handler(CommandHandler("mystats", stats_command))
+    application.add_handler(CommandHandler("bundle", bundle_command))
+    application.add_handler(CommandHandler("done", done_command))
+    application.add_handler(CommandHandler("cancel", cancel_command))
+    # Non-blocking so other updates keep flowing while the profile is captured
+    application.add_handler(CommandHandler("profile", profile_command, block=False))
     application.add_handler(MessageHandler(filters.ALL, handle_message))
     
     # Initialize queue manager
     queue_manager = GlobalQueueManager(application.bot)
     
+    # Seed admission state before polling starts so no reservation gets overwritten
+    await queue_manager.initialize()
+    
     # Start queue processing
     asyncio.create_task(queue_manager.process_queue())
     
@@ -0,0 +1,59 @@
+import time
+from collections import deque
+from config import (
+    BREAKER_WINDOW_SECONDS, BREAKER_MIN_CALLS, BREAKER_FAILURE_RATIO,
+    BREAKER_SLOW_CALL_SECONDS, BREAKER_MIN_THROUGHPUT,
+    BREAKER_COOLDOWN_SECONDS, BREAKER_MAX_COOLDOWN_SECONDS
+)
+
+class CircuitBreaker:
+    """Tracks recent upload outcomes and trips when the endpoint looks unhealthy"""
+    def __init__(self):
+        self.results = deque()
+        self.state = 'closed'
+        self.opened_at = None
+        self.cooldown = BREAKER_COOLDOWN_SECONDS
+    
+    def is_open(self):
+        return self.state == 'open'
+    
+    def record(self, success, elapsed=0, size=0):
+        """Record one call; slow calls for their size count as failures"""
+        if self.is_open():
+            return
+        
+        # Allow big uploads more time than small ones before calling them slow
+        if elapsed > BREAKER_SLOW_CALL_SECONDS + (size or 0) / BREAKER_MIN_THROUGHPUT:
+            success = False
+        
+        now = time.monotonic()
+        self.results.append((now, success))
+        while self.results and self.results[0][0] < now - BREAKER_WINDOW_SECONDS:
+            self.results.popleft()
+        
+        failures = sum(1 for _, ok in self.results if not ok)
+        if len(self.results) >= BREAKER_MIN_CALLS and failures / len(self.results) >= BREAKER_FAILURE_RATIO:
+            self.open()
+            print(f"⚠️ Buzzheavier circuit opened: {failures}/{len(self.results)} recent uploads failed")
+    
+    def open(self):
+        self.state = 'open'
+        self.opened_at = time.monotonic()
+    
+    def seconds_until_probe(self):
+        """Time left before the endpoint should be probed again"""
+        if not self.is_open():
+            return 0
+        return max(0, self.opened_at + self.cooldown - time.monotonic())
+    
+    def probe_result(self, healthy):
+        """Close the circuit after a good probe, or back off after a bad one"""
+        if healthy:
+            self.state = 'closed'
+            self.results.clear()
+            self.cooldown = BREAKER_COOLDOWN_SECONDS
+            print("✅ Buzzheavier circuit closed, resuming uploads")
+        else:
+            self.cooldown = min(self.cooldown * 2, BREAKER_MAX_COOLDOWN_SECONDS)
+            self.open()
+            print(f"⚠️ Buzzheavier probe failed, retrying in {self.cooldown}s")
@@ -6,6 +6,9 @@ load_dotenv()
 # Telegram Bot Configuration
 BOT_TOKEN = "8444487030:AAEqLWrqWSoAjU7BoHzXiYwALZujx-WZlQI"
 
+# Telegram chat IDs allowed to use admin commands (comma separated)
+ADMIN_IDS = [int(chat_id) for chat_id in os.getenv('ADMIN_IDS', '').split(',') if chat_id.strip()]
+
 # Buzzheavier API Configuration
 BUZZHEAVIER_API_KEY = os.getenv('BUZZHEAVIER_API_KEY')
 BUZZHEAVIER_UPLOAD_BASE = "https://w.buzzheavier.com"
@@ -21,9 +24,42 @@ MONGODB_STATS_COLLECTION = "stats"
 # Queue Configuration
 MAX_CONCURRENT_UPLOADS = 3
 
+# Circuit Breaker Configuration
+BREAKER_WINDOW_SECONDS = 300
+BREAKER_MIN_CALLS = 5
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_SLOW_CALL_SECONDS = 30
+BREAKER_MIN_THROUGHPUT = 256 * 1024
+BREAKER_COOLDOWN_SECONDS = 15
+BREAKER_MAX_COOLDOWN_SECONDS = 300
+BREAKER_PROBE_TIMEOUT = 10
+# Uploads that hit endpoint errors wait RETRY_BACKOFF_SECONDS * 2^attempts before retrying
+RETRY_BACKOFF_SECONDS = 30
+
+# Admission Control Configuration
+USER_UPLOADS_PER_MINUTE = 10
+USER_UPLOAD_BURST = 20
+USER_MAX_QUEUED_BYTES = 2 * 1024 * 1024 * 1024
+QUEUE_HIGH_WATER_MARK = 500
+
+# Monitoring Configuration
+LOOP_MONITOR_INTERVAL = 0.1
+LOOP_LAG_THRESHOLD = 0.25
+PROFILE_SAMPLE_INTERVAL = 0.005
+PROFILE_DEFAULT_SECONDS = 10
+PROFILE_MAX_SECONDS = 60
+
+# Bundle Configuration
+BUNDLE_MAX_FILES = 50
+BUNDLE_MAX_BYTES = 200 * 1024 * 1024
+BUNDLE_CHUNK_SIZE = 64 * 1024
+# Bundle PUTs get BUNDLE_TIMEOUT_SECONDS plus time for the data at BUNDLE_MIN_THROUGHPUT
+BUNDLE_TIMEOUT_SECONDS = 120
+BUNDLE_MIN_THROUGHPUT = 256 * 1024
+
 # Bot Messages
 MESSAGES = {
-    'welcome': "🤖 Welcome to Buzzheavier Upload Bot!\n\nSend me any file and I'll upload it to buzzheavier.com\n\nCommands:\n/queue - Check your position\n/status - System status\n/mystats - Your upload statistics",
+    'welcome': "🤖 Welcome to Buzzheavier Upload Bot!\n\nSend me any file and I'll upload it to buzzheavier.com\n\nCommands:\n/queue - Check your position\n/status - System status\n/mystats - Your upload statistics\n/bundle - Start collecting files into one zip\n/done - Upload the collected bundle\n/cancel - Discard the open bundle",
     'file_received': "📁 File received! Added to upload queue. Position in queue: {}",
     'upload_started': "🚀 Starting upload...",
     'upload_success': "✅ Upload successful!\n📄 File: {}\n🔗 Download URL: {}\n📊 Size: {}",
@@ -31,5 +67,19 @@ MESSAGES = {
     'queue_status': "📊 Queue Status:\nTotal in queue: {}\nCurrently processing: {}\nYour position: {}",
     'user_stats': "📈 Your Upload Statistics:\nTotal Uploads: {}\nSuccessful: {}\nFailed: {}\nTotal Size: {}",
     'error': "⚠️ An error occurred: {}",
-    'no_files_in_queue': "📭 You have no files in the queue"
+    'no_files_in_queue': "📭 You have no files in the queue",
+    'bundle_started': "📦 Bundle mode on! Send your files, then use /done to upload them as one zip.",
+    'bundle_already_open': "📦 A bundle is already open with {} file(s). Use /done to upload it.",
+    'bundle_file_added': "📎 Added to bundle ({} file(s) so far). Use /done when finished.",
+    'bundle_full': "⚠️ Bundle is full ({} files max). Use /done to upload it.",
+    'bundle_too_large': "⚠️ This file would take the bundle over {}. Use /done to upload what you have first.",
+    'bundle_empty': "📭 Your bundle has no files yet. Send some files first.",
+    'bundle_cancelled': "🗑️ Bundle discarded ({} file(s)). Files you send now are uploaded one by one again.",
+    'no_bundle_open': "📭 No bundle open. Use /bundle to start one.",
+    'rate_limited': "⏳ You're sending files too fast. Please wait {} seconds and try again.",
+    'quota_exceeded': "📦 You already have too much waiting in the queue (limit {}). Please wait for your uploads to finish.",
+    'queue_full': "🚧 The upload queue is full right now. Please try again in a few minutes.",
+    'not_admin': "⛔ This command is only available to bot admins.",
+    'profile_started': "🔬 Profiling for {} seconds...",
+    'bundle_queued': "📦 Bundle of {} file(s) added to upload queue. Position in queue: {}"
 }
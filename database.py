@@ -47,6 +47,10 @@ class MongoDBManager:
             'max_attempts': 3
         }
         
+        # Bundles carry the list of files that go into the archive
+        if 'files' in file_data:
+            queue_item['files'] = file_data['files']
+        
         result = await self.queue.insert_one(queue_item)
         
         # Get position in queue
@@ -62,7 +66,9 @@ class MongoDBManager:
         item = await self.queue.find_one_and_update(
             {
                 'status': 'queued',
-                'attempts': {'$lt': '$max_attempts'}
+                'attempts': {'$lt': '$max_attempts'},
+                # Skip items still backing off after a transient failure
+                'not_before': {'$not': {'$gt': datetime.utcnow()}}
             },
             {
                 '$set': {
@@ -100,6 +106,20 @@ class MongoDBManager:
         else:
             await self.update_user_stats(file_id, False)
     
+    async def requeue(self, file_id, delay=0, refund_attempt=False):
+        """Put an upload back in the queue after a transient failure"""
+        update = {
+            '$set': {
+                'status': 'queued',
+                'updated_at': datetime.utcnow(),
+                'not_before': datetime.utcnow() + timedelta(seconds=delay)
+            }
+        }
+        if refund_attempt:
+            update['$inc'] = {'attempts': -1}
+        
+        await self.queue.update_one({'file_id': file_id}, update)
+    
     async def update_user_stats(self, file_id, success=True):
         """Update user upload statistics"""
         file_item = await self.queue.find_one({'file_id': file_id})
@@ -154,6 +174,18 @@ class MongoDBManager:
             'failed': total_failed
         }
     
+    async def get_pending_by_user(self):
+        """Get count and total size of unfinished uploads per user"""
+        cursor = self.queue.aggregate([
+            {'$match': {'status': {'$in': ['queued', 'processing']}}},
+            {'$group': {
+                '_id': '$chat_id',
+                'count': {'$sum': 1},
+                'bytes': {'$sum': {'$ifNull': ['$file_size', 0]}}
+            }}
+        ])
+        return await cursor.to_list(length=None)
+    
     async def get_user_position(self, chat_id):
         """Get user's position in queue"""
         user_item = await self.queue.find_one(
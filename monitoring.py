@@ -0,0 +1,137 @@
+import asyncio
+import io
+import logging
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from config import LOOP_MONITOR_INTERVAL, LOOP_LAG_THRESHOLD, PROFILE_SAMPLE_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+def stack_key(frame):
+    """Cheap outermost-first description of a frame's stack"""
+    stack = []
+    while frame is not None:
+        stack.append(f"{frame.f_code.co_filename}:{frame.f_lineno} {frame.f_code.co_name}")
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+def dump_tasks():
+    """Return the stacks of all asyncio tasks on the running loop as text"""
+    buffer = io.StringIO()
+    tasks = asyncio.all_tasks()
+    buffer.write(f"{len(tasks)} asyncio task(s)\n")
+    for task in tasks:
+        buffer.write(f"\n{task!r}\n")
+        task.print_stack(file=buffer)
+    return buffer.getvalue()
+
+class LoopMonitor:
+    """Detects event loop stalls and samples what the loop thread is doing"""
+    def __init__(self):
+        self.loop = None
+        self.loop_thread_id = None
+        self.last_beat = time.monotonic()
+        self.stall_reported = False
+        self.profile_lock = asyncio.Lock()
+    
+    async def run(self):
+        """Heartbeat coroutine; a watchdog thread reports when it stops ticking"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        
+        threading.Thread(target=self.watchdog, name="loop-watchdog", daemon=True).start()
+        
+        while True:
+            expected = time.monotonic() + LOOP_MONITOR_INTERVAL
+            await asyncio.sleep(LOOP_MONITOR_INTERVAL)
+            now = time.monotonic()
+            lag = now - expected
+            self.last_beat = now
+            
+            if lag > LOOP_LAG_THRESHOLD:
+                logger.warning(f"Event loop lagged {lag:.3f}s")
+            self.stall_reported = False
+    
+    def watchdog(self):
+        """Log the loop thread's stack while a callback is blocking it"""
+        while True:
+            time.sleep(LOOP_MONITOR_INTERVAL / 2)
+            stalled_for = time.monotonic() - self.last_beat - LOOP_MONITOR_INTERVAL
+            if stalled_for <= LOOP_LAG_THRESHOLD or self.stall_reported:
+                continue
+            
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            
+            self.stall_reported = True
+            task = asyncio.current_task(self.loop)
+            logger.warning(
+                f"Event loop blocked for {stalled_for:.3f}s in {task!r}\n"
+                + ''.join(traceback.format_stack(frame))
+            )
+    
+    def sample_thread(self, seconds, stacks):
+        """Sample the loop thread's stack from another thread (runs off-loop)"""
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is not None:
+                stacks[stack_key(frame)] += 1
+            time.sleep(PROFILE_SAMPLE_INTERVAL)
+    
+    async def sample_signal(self, seconds, stacks):
+        """Sample the main thread's stack from a SIGALRM interval timer"""
+        def on_alarm(signum, frame):
+            stacks[stack_key(frame)] += 1
+        
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, PROFILE_SAMPLE_INTERVAL, PROFILE_SAMPLE_INTERVAL)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    
+    async def collect_samples(self, seconds, stacks):
+        """Fill stacks with samples of the loop thread for the given time"""
+        # A sampler thread only gets the GIL when the loop releases it (mostly
+        # inside select), so prefer signals, which land in whatever is running
+        if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+            await self.sample_signal(seconds, stacks)
+        else:
+            await asyncio.to_thread(self.sample_thread, seconds, stacks)
+    
+    async def capture_profile(self, seconds):
+        """Capture a sampling profile plus a task dump of the running bot"""
+        stacks = Counter()
+        
+        # Only one profile at a time, since the SIGALRM handler is process-wide
+        async with self.profile_lock:
+            await self.collect_samples(seconds, stacks)
+        
+        samples = sum(stacks.values())
+        functions = Counter()
+        for stack, count in stacks.items():
+            functions[stack[-1]] += count
+        
+        buffer = io.StringIO()
+        buffer.write(f"Sampling profile: {samples} samples over {seconds}s\n\n")
+        buffer.write("Top frames:\n")
+        for location, count in functions.most_common(25):
+            buffer.write(f"{count / max(samples, 1):7.2%}  {location}\n")
+        
+        buffer.write("\nTop stacks:\n")
+        for stack, count in stacks.most_common(10):
+            buffer.write(f"\n{count / max(samples, 1):.2%}\n")
+            for location in stack:
+                buffer.write(f"    {location}\n")
+        
+        buffer.write("\n\n")
+        buffer.write(dump_tasks())
+        return buffer.getvalue()
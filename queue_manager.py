@@ -2,9 +2,10 @@ import asyncio
 import time
 from database import MongoDBManager
 from uploader import BuzzheavierUploader
+from admission import AdmissionController
 
 # Import MESSAGES directly from config to avoid circular imports
-from config import MESSAGES
+from config import MESSAGES, MAX_CONCURRENT_UPLOADS, RETRY_BACKOFF_SECONDS
 
 class GlobalQueueManager:
     def __init__(self, bot):
@@ -13,31 +14,40 @@ class GlobalQueueManager:
         self.bot = bot
         self.is_processing = False
         self.active_tasks = set()
+        self.admission = AdmissionController()
     
     async def initialize(self):
-        """Initialize the database indexes"""
+        """Initialize the database indexes and admission state (before accepting messages)"""
         await self.db.ensure_indexes()
+        self.admission.seed(await self.db.get_pending_by_user())
     
     async def add_to_queue(self, file_data):
-        """Add file to global queue"""
-        return await self.db.add_to_queue(file_data)
+        """Add file to global queue, raising AdmissionRejected when over limits"""
+        self.admission.admit(file_data['chat_id'], file_data['file_size'])
+        try:
+            return await self.db.add_to_queue(file_data)
+        except Exception:
+            self.admission.release(file_data['chat_id'], file_data['file_size'])
+            raise
     
     async def process_queue(self):
         """Process the upload queue continuously"""
         if self.is_processing:
             return
         
-        # Initialize database first
-        await self.initialize()
-        
         self.is_processing = True
         print("🚀 Starting queue processing...")
         
         try:
             while True:
                 # Check if we can process more concurrent uploads
-                if len(self.active_tasks) >= 3:
-                    await asyncio.sleep(1)
+                if len(self.active_tasks) >= MAX_CONCURRENT_UPLOADS:
+                    await asyncio.wait(self.active_tasks, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                
+                # Hold off claiming work while buzzheavier is unhealthy
+                if self.uploader.breaker.is_open():
+                    await self.uploader.wait_until_available()
                     continue
                 
                 # Get next item from queue
@@ -55,9 +65,6 @@ class GlobalQueueManager:
                 self.active_tasks.add(task)
                 task.add_done_callback(self.active_tasks.discard)
                 
-                # Small delay between starting tasks
-                await asyncio.sleep(0.5)
-                
         except Exception as e:
             print(f"Queue processing error: {e}")
         finally:
@@ -67,7 +74,14 @@ class GlobalQueueManager:
     
     async def process_single_upload(self, queue_item):
         """Process a single upload item"""
+        requeued = False
         try:
+            # The circuit may have opened since this item was claimed
+            if self.uploader.breaker.is_open():
+                await self.db.requeue(queue_item['file_id'], refund_attempt=True)
+                requeued = True
+                return
+            
             # Send upload started message
             await self.bot.send_message(
                 chat_id=queue_item['chat_id'],
@@ -76,7 +90,10 @@ class GlobalQueueManager:
             )
             
             # Perform upload
-            result = await self.uploader.upload_file(queue_item)
+            if queue_item.get('file_type') == 'bundle':
+                result = await self.uploader.upload_bundle(queue_item)
+            else:
+                result = await self.uploader.upload_file(queue_item)
             
             if result['success']:
                 # Mark as completed
@@ -95,6 +112,15 @@ class GlobalQueueManager:
                     ),
                     reply_to_message_id=queue_item['message_id']
                 )
+            elif result.get('retryable') and queue_item['attempts'] + 1 < queue_item['max_attempts']:
+                # Endpoint trouble: put it back quietly and try again later
+                # (attempts is the count from before this claim), backing off so
+                # it isn't re-downloaded straight away against a failing endpoint
+                await self.db.requeue(
+                    queue_item['file_id'],
+                    delay=RETRY_BACKOFF_SECONDS * 2 ** queue_item['attempts']
+                )
+                requeued = True
             else:
                 # Mark as failed
                 await self.db.mark_completed(
@@ -115,6 +141,9 @@ class GlobalQueueManager:
                 queue_item['file_id'],
                 error=str(e)
             )
+        finally:
+            if not requeued:
+                self.admission.release(queue_item['chat_id'], queue_item.get('file_size'))
     
     async def get_queue_stats(self):
         """Get queue statistics"""
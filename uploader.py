@@ -1,18 +1,64 @@
 import aiohttp
 import asyncio
 import base64
-from config import BUZZHEAVIER_API_KEY, BUZZHEAVIER_UPLOAD_BASE
+import time
+import zipfile
+from circuit_breaker import CircuitBreaker
+from config import (
+    BUZZHEAVIER_API_KEY, BUZZHEAVIER_UPLOAD_BASE, BUNDLE_CHUNK_SIZE,
+    BUNDLE_TIMEOUT_SECONDS, BUNDLE_MIN_THROUGHPUT, BREAKER_PROBE_TIMEOUT
+)
+
+class _ZipStreamBuffer:
+    """Write-only sink for zipfile that hands out the bytes written since the last drain"""
+    def __init__(self):
+        self.chunks = []
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+class BundleFetchError(Exception):
+    """Raised when a bundle member can't be fetched from Telegram"""
+    pass
 
 class BuzzheavierUploader:
     def __init__(self, bot):
         self.bot = bot
         self.session = None
+        self.breaker = CircuitBreaker()
     
     async def get_session(self):
         if self.session is None:
             self.session = aiohttp.ClientSession()
         return self.session
     
+    async def probe(self):
+        """Cheap request to check whether buzzheavier is answering again"""
+        try:
+            session = await self.get_session()
+            async with session.head(
+                BUZZHEAVIER_UPLOAD_BASE,
+                timeout=aiohttp.ClientTimeout(total=BREAKER_PROBE_TIMEOUT)
+            ) as response:
+                return response.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False
+    
+    async def wait_until_available(self):
+        """Block while the circuit is open, probing before letting uploads resume"""
+        while self.breaker.is_open():
+            await asyncio.sleep(self.breaker.seconds_until_probe())
+            self.breaker.probe_result(await self.probe())
+    
     def format_file_size(self, size_bytes):
         """Format file size in human readable format"""
         if not size_bytes:
@@ -52,11 +98,13 @@ class BuzzheavierUploader:
             # Upload to buzzheavier using PUT method
             session = await self.get_session()
             
+            started = time.monotonic()
             async with session.put(
                 upload_url,
                 data=file_content,
                 headers=headers
             ) as response:
+                self.breaker.record(response.status < 500, time.monotonic() - started, len(file_content))
                 
                 if response.status in [200, 201]:
                     # For buzzheavier, the response might be the download URL or JSON
@@ -83,9 +131,18 @@ class BuzzheavierUploader:
                     error_text = await response.text()
                     return {
                         'success': False,
-                        'error': f"HTTP {response.status}: {error_text}"
+                        'error': f"HTTP {response.status}: {error_text}",
+                        'retryable': response.status >= 500
                     }
                     
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Network trouble talking to buzzheavier counts against the endpoint
+            self.breaker.record(False)
+            return {
+                'success': False,
+                'error': str(e),
+                'retryable': True
+            }
         except Exception as e:
             return {
                 'success': False,
@@ -110,11 +167,13 @@ class BuzzheavierUploader:
             
             session = await self.get_session()
             
+            started = time.monotonic()
             async with session.put(
                 upload_url,
                 data=file_content,
                 headers=headers
             ) as response:
+                self.breaker.record(response.status < 500, time.monotonic() - started, len(file_content))
                 
                 if response.status in [200, 201]:
                     response_text = await response.text()
@@ -137,9 +196,152 @@ class BuzzheavierUploader:
                     error_text = await response.text()
                     return {
                         'success': False,
-                        'error': f"HTTP {response.status}: {error_text}"
+                        'error': f"HTTP {response.status}: {error_text}",
+                        'retryable': response.status >= 500
+                    }
+                    
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Network trouble talking to buzzheavier counts against the endpoint
+            self.breaker.record(False)
+            return {
+                'success': False,
+                'error': str(e),
+                'retryable': True
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
+    async def fetch_telegram_file(self, item):
+        """Yield a Telegram file's content chunk by chunk"""
+        session = await self.get_session()
+        try:
+            file = await self.bot.get_file(item['file_id'])
+            async with session.get(file.file_path) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(BUNDLE_CHUNK_SIZE):
+                    yield chunk
+        except Exception as e:
+            # file_path embeds the bot token, so never pass the original error on
+            raise BundleFetchError(
+                f"Could not fetch {item['file_name']} from Telegram ({e.__class__.__name__})"
+            ) from None
+    
+    async def stream_bundle(self, files, totals):
+        """Yield a zip archive of the given Telegram files chunk by chunk"""
+        buffer = _ZipStreamBuffer()
+        used_names = set()
+        
+        # The buffer is not seekable, so zipfile writes data descriptors after
+        # each entry and never needs the whole archive in memory
+        with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED) as archive:
+            for item in files:
+                # Keep entry names unique so nothing gets shadowed on extract
+                entry_name = item['file_name']
+                counter = 1
+                while entry_name in used_names:
+                    stem, dot, ext = item['file_name'].rpartition('.')
+                    entry_name = f"{stem} ({counter}).{ext}" if dot else f"{item['file_name']} ({counter})"
+                    counter += 1
+                used_names.add(entry_name)
+                
+                # Time spent waiting on Telegram is tracked separately so it
+                # doesn't count towards buzzheavier's latency
+                with archive.open(entry_name, mode='w') as entry:
+                    fetch_started = time.monotonic()
+                    async for chunk in self.fetch_telegram_file(item):
+                        totals['fetch_seconds'] += time.monotonic() - fetch_started
+                        entry.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            totals['bytes'] += len(data)
+                            yield data
+                        fetch_started = time.monotonic()
+                    totals['fetch_seconds'] += time.monotonic() - fetch_started
+                
+                data = buffer.drain()
+                if data:
+                    totals['bytes'] += len(data)
+                    yield data
+        
+        # Central directory is written when the archive is closed
+        data = buffer.drain()
+        totals['bytes'] += len(data)
+        yield data
+    
+    async def upload_bundle(self, bundle_data):
+        """Upload several files to buzzheavier.com as a single zip archive"""
+        try:
+            file_name = bundle_data['file_name']
+            upload_url = f"{BUZZHEAVIER_UPLOAD_BASE}/{file_name}"
+            
+            headers = {'Content-Type': 'application/zip'}
+            if BUZZHEAVIER_API_KEY:
+                headers['Authorization'] = f'Bearer {BUZZHEAVIER_API_KEY}'
+            
+            session = await self.get_session()
+            totals = {'bytes': 0, 'fetch_seconds': 0}
+            
+            # The session default (300s total) is too short for big bundles, and
+            # sock_read would fire mid-upload since the server answers only at the end
+            timeout = aiohttp.ClientTimeout(
+                total=BUNDLE_TIMEOUT_SECONDS + (bundle_data['file_size'] or 0) / BUNDLE_MIN_THROUGHPUT,
+                sock_connect=30
+            )
+            
+            # The archive is built while it is being sent, so the request
+            # goes out with chunked transfer encoding
+            started = time.monotonic()
+            async with session.put(
+                upload_url,
+                data=self.stream_bundle(bundle_data['files'], totals),
+                headers=headers,
+                timeout=timeout
+            ) as response:
+                elapsed = time.monotonic() - started - totals['fetch_seconds']
+                self.breaker.record(response.status < 500, elapsed, bundle_data['file_size'])
+                
+                if response.status in [200, 201]:
+                    response_text = await response.text()
+                    try:
+                        import json
+                        result = json.loads(response_text)
+                        download_url = result.get('url', response_text)
+                    except:
+                        download_url = response_text
+                    
+                    formatted_size = self.format_file_size(totals['bytes'])
+                    
+                    return {
+                        'success': True,
+                        'download_url': download_url,
+                        'file_name': file_name,
+                        'file_size': formatted_size
+                    }
+                else:
+                    error_text = await response.text()
+                    return {
+                        'success': False,
+                        'error': f"HTTP {response.status}: {error_text}",
+                        'retryable': response.status >= 500
                     }
                     
+        except BundleFetchError as e:
+            # Telegram-side trouble says nothing about buzzheavier's health
+            return {
+                'success': False,
+                'error': str(e)
+            }
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Network trouble talking to buzzheavier counts against the endpoint
+            self.breaker.record(False)
+            return {
+                'success': False,
+                'error': str(e),
+                'retryable': True
+            }
         except Exception as e:
             return {
                 'success': False,